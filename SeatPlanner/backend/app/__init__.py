@@ -1,21 +1,32 @@
+import os
 from flask import Flask
 from flask_cors import CORS
-from .models import db
+from .models import db, ensure_columns, ensure_indexes
+from .compression import init_compression
+from .profiling import init_profiling
 
-def create_app():
+def create_app(config=None):
+    """Build the app without touching the database schema.
+
+    Schema creation is a separate, explicit step (init_db() or the
+    `flask init-db` command) so that worker start-up stays cheap.
+    """
     app = Flask(__name__)
-    CORS(app)
-    
-    import os
+    # Cross-origin pages can only read custom headers that are exposed
+    CORS(app, expose_headers=['X-Total-Count'])
     
     # Create instance directory for database
     instance_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
     os.makedirs(instance_path, exist_ok=True)
     
-    # Configure SQLAlchemy with absolute path
+    # Configure SQLAlchemy with absolute path, unless DATABASE_URL points elsewhere
     db_path = os.path.join(instance_path, 'seating_arrangement.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Overrides such as a different database for tooling
+    if config:
+        app.config.update(config)
     
     # Initialize extensions
     db.init_app(app)
@@ -23,26 +34,25 @@ def create_app():
     # Register blueprints
     from .routes import main
     app.register_blueprint(main)
-    
-    # Create tables
-    with app.app_context():
-        db.create_all()
+
+    # Compress large JSON responses
+    init_compression(app)
+
+    # Admin-only per-request profiling; registered after compression so its
+    # after_request hook sees the uncompressed body
+    init_profiling(app)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables, columns and indexes."""
+        init_db(app)
+        print('Database schema is up to date.')
     
     return app
-    db.init_app(app)
-    
-    # Import and register blueprints
-    from .routes import main
-    app.register_blueprint(main)
-    
-    # Create database tables
+
+def init_db(app):
+    """Create any missing tables, columns and indexes. Safe to run repeatedly."""
     with app.app_context():
-        try:
-            # Drop all tables first to ensure clean slate
-            db.drop_all()
-        except:
-            pass
-        # Create all tables with new schema
         db.create_all()
-    
-    return app
\ No newline at end of file
+        ensure_columns()
+        ensure_indexes()
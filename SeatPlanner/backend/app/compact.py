@@ -0,0 +1,61 @@
+from .seatmap import mask_to_bytes
+
+COMPACT_MIMETYPE = 'application/vnd.seatplanner.compact+json'
+
+# Column order of each row in the compact `students` table
+STUDENT_FIELDS = ['id', 'roll_number', 'name', 'course', 'semester']
+
+
+def wants_compact(request):
+    """True if the client asked for the compact format via ?format=compact
+    or by listing the compact media type in its Accept header.
+    """
+    if request.args.get('format') == 'compact':
+        return True
+    return request.accept_mimetypes[COMPACT_MIMETYPE] > request.accept_mimetypes['application/json']
+
+
+def build_compact_plan(header, classrooms, arrangements_by_classroom):
+    """Columnar seating plan: every student is listed once and each room is a
+    dense row-major array of indices into that list (-1 for an empty seat).
+
+    Course names are interned in a separate `courses` list and referenced by
+    index from the student rows. `seat_mask` is the room's packed blocked-seat
+    mask as little-endian hex.
+    """
+    courses = []
+    course_index = {}
+    students = []
+    student_index = {}
+    rooms = []
+
+    for classroom in classrooms:
+        seats = [-1] * (classroom.rows * classroom.columns)
+        for arrangement in arrangements_by_classroom.get(classroom.id, ()):
+            student = arrangement.student
+            if student is None:
+                continue
+            row, column = arrangement.row_number - 1, arrangement.column_number - 1
+            if not (0 <= row < classroom.rows and 0 <= column < classroom.columns):
+                continue
+
+            index = student_index.get(student.id)
+            if index is None:
+                course = course_index.get(student.course)
+                if course is None:
+                    course = course_index[student.course] = len(courses)
+                    courses.append(student.course)
+                index = student_index[student.id] = len(students)
+                students.append([student.id, student.roll_number, student.name, course, student.semester])
+            seats[row * classroom.columns + column] = index
+
+        rooms.append({
+            'classroom_name': classroom.name,
+            'rows': classroom.rows,
+            'columns': classroom.columns,
+            'seat_mask': mask_to_bytes(classroom.blocked_mask, classroom.rows, classroom.columns).hex(),
+            'seats': seats
+        })
+
+    return dict(header, format='compact', student_fields=STUDENT_FIELDS,
+                courses=courses, students=students, classrooms=rooms)
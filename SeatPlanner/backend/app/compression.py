@@ -0,0 +1,54 @@
+import gzip
+from flask import request
+from .compact import COMPACT_MIMETYPE
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+# Responses smaller than this are not worth the CPU or the extra headers
+MIN_COMPRESS_SIZE = 1024
+
+COMPRESSIBLE_MIMETYPES = {'application/json', COMPACT_MIMETYPE}
+
+
+def choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, request):
+    """Compress large JSON bodies with brotli or gzip per Accept-Encoding"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(body, quality=5)
+    else:
+        body = gzip.compress(body, compresslevel=6)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, request)
@@ -0,0 +1,56 @@
+from .models import db, Student, SeatingArrangement, ExamCourseCounter
+
+
+def exam_branches(exam):
+    return [branch.strip() for branch in exam.branches.split(',') if branch.strip()]
+
+
+def refresh_exam_counters(exam):
+    """Recompute an exam's per-course counters from two grouped queries.
+
+    Called whenever a plan is written, so reads never have to touch the
+    student or seating tables. The caller commits.
+    """
+    branches = exam_branches(exam)
+    eligible = dict(
+        db.session.query(Student.course, db.func.count(Student.id))
+        .filter(Student.course.in_(branches))
+        .group_by(Student.course)
+        .all()
+    )
+    assigned = dict(
+        db.session.query(Student.course, db.func.count(SeatingArrangement.id))
+        .join(SeatingArrangement, SeatingArrangement.student_id == Student.id)
+        .filter(SeatingArrangement.exam_id == exam.id)
+        .group_by(Student.course)
+        .all()
+    )
+
+    existing = {c.course: c for c in ExamCourseCounter.query.filter_by(exam_id=exam.id).all()}
+    for course in set(branches) | set(assigned):
+        counter = existing.pop(course, None)
+        if counter is None:
+            counter = ExamCourseCounter(exam_id=exam.id, course=course)
+            db.session.add(counter)
+        counter.eligible = eligible.get(course, 0)
+        counter.assigned = assigned.get(course, 0)
+    for stale in existing.values():
+        db.session.delete(stale)
+
+
+def get_exam_counters(exam):
+    """Counters for an exam, built on first use for exams that predate them"""
+    counters = ExamCourseCounter.query.filter_by(exam_id=exam.id).order_by(ExamCourseCounter.course).all()
+    if not counters:
+        refresh_exam_counters(exam)
+        db.session.commit()
+        counters = ExamCourseCounter.query.filter_by(exam_id=exam.id).order_by(ExamCourseCounter.course).all()
+    return counters
+
+
+def increment_eligible(course):
+    """A new student joins every exam counter for their course"""
+    ExamCourseCounter.query.filter_by(course=course).update(
+        {ExamCourseCounter.eligible: ExamCourseCounter.eligible + 1},
+        synchronize_session=False
+    )
@@ -0,0 +1,80 @@
+import json
+import queue
+import threading
+
+
+class SeatingEventBroker:
+    """In-process pub/sub of seating changes, one channel per exam.
+
+    Each subscriber gets its own bounded queue so a slow client cannot hold up
+    writers; if its queue fills up the client is told to resync instead.
+    Events only reach clients connected to the same process. Plan versions
+    are not kept here: publishers pass in the exam's stored plan_version.
+    """
+
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, exam_id):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(exam_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, exam_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(exam_id)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[exam_id]
+
+    def publish(self, exam_id, version, event, data):
+        """Fan an event for a committed plan version out to the exam's subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(exam_id, ()))
+
+        message = {'event': event, 'version': version, 'data': dict(data, exam_id=exam_id)}
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Drop the backlog and ask the client to reload the whole plan
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait({'event': 'resync', 'version': version, 'data': {'exam_id': exam_id}})
+
+
+def format_sse(message):
+    """Serialise a broker message as a text/event-stream frame"""
+    return (f"id: {message['version']}\n"
+            f"event: {message['event']}\n"
+            f"data: {json.dumps(message['data'], separators=(',', ':'))}\n\n")
+
+
+def diff_seating(old, new):
+    """Compare two {student_id: (classroom_name, row, column)} maps and return
+    the seat-level changes as a list of event payloads.
+    """
+    changes = []
+    for student_id, seat in new.items():
+        previous = old.get(student_id)
+        if previous is None:
+            changes.append({'type': 'assigned', 'student_id': student_id, 'to': _seat(seat)})
+        elif previous != seat:
+            changes.append({'type': 'moved', 'student_id': student_id,
+                            'from': _seat(previous), 'to': _seat(seat)})
+    for student_id, seat in old.items():
+        if student_id not in new:
+            changes.append({'type': 'cleared', 'student_id': student_id, 'from': _seat(seat)})
+    return changes
+
+
+def _seat(seat):
+    classroom_name, row, column = seat
+    return {'classroom_name': classroom_name, 'row': row, 'column': column}
+
+
+broker = SeatingEventBroker()
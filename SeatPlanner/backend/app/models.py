@@ -1,5 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.schema import CreateColumn
 from werkzeug.security import generate_password_hash, check_password_hash
+from .seatmap import mask_from_bytes
 
 db = SQLAlchemy()
 
@@ -28,7 +30,7 @@ class Student(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     roll_number = db.Column(db.String(20), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    course = db.Column(db.String(50), nullable=False)
+    course = db.Column(db.String(50), nullable=False, index=True)
     semester = db.Column(db.Integer, nullable=False)
     
     def to_dict(self):
@@ -46,6 +48,17 @@ class Classroom(db.Model):
     capacity = db.Column(db.Integer, nullable=False)
     rows = db.Column(db.Integer, nullable=False)
     columns = db.Column(db.Integer, nullable=False)
+
+    @property
+    def blocked_mask(self):
+        """Packed mask of unusable seats (see seatmap.py); 0 for a full rectangle"""
+        if self.seat_map is None:
+            return 0
+        return mask_from_bytes(self.seat_map.blocked, self.rows, self.columns)
+
+    @property
+    def usable_capacity(self):
+        return min(self.capacity, self.rows * self.columns - self.blocked_mask.bit_count())
     
     def to_dict(self):
         return {
@@ -53,9 +66,18 @@ class Classroom(db.Model):
             'name': self.name,
             'capacity': self.capacity,
             'rows': self.rows,
-            'columns': self.columns
+            'columns': self.columns,
+            'usable_capacity': self.usable_capacity
         }
 
+class ClassroomSeatMap(db.Model):
+    """Blocked seats of a classroom, packed one bit per seat"""
+    classroom_id = db.Column(db.Integer, db.ForeignKey('classroom.id'), primary_key=True)
+    blocked = db.Column(db.LargeBinary, nullable=False, default=b'')
+
+    # Loaded together with its classroom so layouts never cost an extra query
+    classroom = db.relationship('Classroom', backref=db.backref('seat_map', uselist=False, lazy='joined'))
+
 class Exam(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     subject_code = db.Column(db.String(20), nullable=False)
@@ -64,6 +86,25 @@ class Exam(db.Model):
     duration = db.Column(db.Integer, nullable=False)  # Duration in minutes
     session = db.Column(db.String(20), nullable=False)  # Morning/Afternoon/Evening
     branches = db.Column(db.String(500), nullable=False)  # Comma-separated list of branches
+    # Bumped in the same transaction as every seating write, so clients can
+    # tell whether their copy of the plan is current across restarts and workers
+    plan_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def bump_plan_version(self):
+        """Increment plan_version inside the current transaction and return it"""
+        self.plan_version = Exam.plan_version + 1
+        db.session.flush()
+        return self.plan_version
+
+    @staticmethod
+    def bump_plan_versions(exam_ids):
+        """Increment plan_version of several exams inside the current
+        transaction and return {exam_id: new version}"""
+        if not exam_ids:
+            return {}
+        (Exam.query.filter(Exam.id.in_(exam_ids))
+         .update({Exam.plan_version: Exam.plan_version + 1}, synchronize_session=False))
+        return dict(db.session.query(Exam.id, Exam.plan_version).filter(Exam.id.in_(exam_ids)).all())
 
     def get_time_range(self):
         end_time = self.date + db.func.cast(db.func.concat(self.duration, ' minutes'), db.Interval)
@@ -79,4 +120,70 @@ class SeatingArrangement(db.Model):
     
     exam = db.relationship('Exam', backref='seating_arrangements')
     student = db.relationship('Student', backref='seating_arrangements')
-    classroom = db.relationship('Classroom', backref='seating_arrangements')
\ No newline at end of file
+    classroom = db.relationship('Classroom', backref='seating_arrangements')
+
+    # Covers per-exam lookups and the available-students anti-join
+    __table_args__ = (
+        db.Index('ix_seating_arrangement_exam_student', 'exam_id', 'student_id'),
+    )
+
+class ExamCourseCounter(db.Model):
+    """Per-exam, per-course head counts kept up to date when plans are written"""
+    id = db.Column(db.Integer, primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
+    course = db.Column(db.String(50), nullable=False)
+    eligible = db.Column(db.Integer, nullable=False, default=0)
+    assigned = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('exam_id', 'course', name='uq_exam_course_counter'),
+    )
+
+    def to_dict(self):
+        return {
+            'course': self.course,
+            'eligible': self.eligible,
+            'assigned': self.assigned,
+            'remaining': max(self.eligible - self.assigned, 0)
+        }
+
+
+def missing_schema():
+    """Tables and columns declared on the models but absent from the database,
+    as 'table' or 'table.column'. Empty once init_db has been run."""
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            missing.append(table.name)
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing.extend(f'{table.name}.{column.name}' for column in table.columns
+                       if column.name not in existing)
+    return missing
+
+
+def ensure_columns():
+    """create_all() skips tables that already exist, so add any columns
+    declared since an older database was created. New columns need a server
+    default (or must be nullable) for this to work on populated tables."""
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                    conn.exec_driver_sql(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}')
+
+
+def ensure_indexes():
+    """create_all() skips tables that already exist, so add any indexes
+    declared since an older database was created."""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
\ No newline at end of file
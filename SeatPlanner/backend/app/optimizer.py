@@ -0,0 +1,178 @@
+import math
+import random
+import time
+from .seatmap import row_bits
+
+# Penalty for two occupied seats at a given Chebyshev distance, keyed by
+# (same course, distance). Same-course neighbours are what invigilators care
+# about most; different courses only need to avoid touching seats.
+PAIR_PENALTY = {
+    (True, 1): 8, (True, 2): 3,
+    (False, 1): 2, (False, 2): 0,
+}
+RADIUS = 2
+
+
+def spread_seat_order(rows, cols, blocked=0):
+    """Open seats ordered so that every other row and column is filled first"""
+    row_full = (1 << cols) - 1
+    seats = []
+    for r in range(rows):
+        open_seats = ~row_bits(blocked, r, cols) & row_full
+        while open_seats:
+            low = open_seats & -open_seats
+            open_seats ^= low
+            seats.append((r, low.bit_length() - 1))
+    return sorted(seats, key=lambda p: (p[0] % 2, p[1] % 2, p[0], p[1]))
+
+
+class SeatingOptimizer:
+    """Anytime simulated annealing over seat assignments.
+
+    Starts from a cheap spread-out placement and improves it with random
+    swaps (between students of different courses, possibly across rooms) and
+    moves into empty seats within a room, so per-room head counts never
+    change. `optimize` can be stopped at any deadline and always returns the
+    best placement seen so far.
+    """
+
+    def __init__(self, rooms, targets, courses, seed=None, blocked=None):
+        # rooms: list of (classroom_id, rows, columns); targets: classroom_id -> count;
+        # courses: course name per student, in the order students should be seated;
+        # blocked: classroom_id -> packed mask of seats that must stay empty
+        self.rooms = rooms
+        self.rng = random.Random(seed)
+        course_ids = {}
+        self.course = [course_ids.setdefault(c, len(course_ids)) for c in courses]
+        self.grids = [[[-1] * cols for _ in range(rows)] for _, rows, cols in rooms]
+        self.pos = [None] * len(courses)
+        self.empty = [[] for _ in rooms]
+
+        student = 0
+        for room, (classroom_id, rows, cols) in enumerate(rooms):
+            order = spread_seat_order(rows, cols, (blocked or {}).get(classroom_id, 0))
+            count = min(targets.get(classroom_id, 0), len(order), len(courses) - student)
+            for r, c in order[:count]:
+                self.grids[room][r][c] = student
+                self.pos[student] = (room, r, c)
+                student += 1
+            self.empty[room].extend(order[count:])
+        if student < len(courses):
+            raise ValueError(f'Room targets only cover {student} of {len(courses)} students')
+
+        self.score = sum(self.seat_cost(*self.pos[s], self.course[s]) for s in range(len(courses))) // 2
+        self.initial_score = self.score
+
+    def seat_cost(self, room, row, col, course):
+        """Penalty between a (possibly hypothetical) student at a seat and its neighbours"""
+        grid = self.grids[room]
+        rows, cols = len(grid), len(grid[0])
+        cost = 0
+        for r in range(max(0, row - RADIUS), min(rows, row + RADIUS + 1)):
+            line = grid[r]
+            for c in range(max(0, col - RADIUS), min(cols, col + RADIUS + 1)):
+                other = line[c]
+                if other < 0 or (r == row and c == col):
+                    continue
+                cost += PAIR_PENALTY[(self.course[other] == course, max(abs(r - row), abs(c - col)))]
+        return cost
+
+    def _set(self, student, room, row, col):
+        self.grids[room][row][col] = student
+        self.pos[student] = (room, row, col)
+
+    def _try_swap(self, a, b, temperature):
+        ra, rowa, cola = self.pos[a]
+        rb, rowb, colb = self.pos[b]
+        before = self.seat_cost(ra, rowa, cola, self.course[a]) + self.seat_cost(rb, rowb, colb, self.course[b])
+        self._set(a, rb, rowb, colb)
+        self._set(b, ra, rowa, cola)
+        after = self.seat_cost(ra, rowa, cola, self.course[b]) + self.seat_cost(rb, rowb, colb, self.course[a])
+        # The a-b pair term, if any, appears on both sides and cancels out
+        delta = after - before
+        if self._accept(delta, temperature):
+            self.score += delta
+            return True
+        self._set(a, ra, rowa, cola)
+        self._set(b, rb, rowb, colb)
+        return False
+
+    def _try_move(self, student, temperature):
+        room, row, col = self.pos[student]
+        empties = self.empty[room]
+        if not empties:
+            return False
+        slot = self.rng.randrange(len(empties))
+        new_row, new_col = empties[slot]
+        course = self.course[student]
+        before = self.seat_cost(room, row, col, course)
+        self.grids[room][row][col] = -1
+        after = self.seat_cost(room, new_row, new_col, course)
+        delta = after - before
+        if not self._accept(delta, temperature):
+            self.grids[room][row][col] = student
+            return False
+        self._set(student, room, new_row, new_col)
+        empties[slot] = (row, col)
+        self.score += delta
+        return True
+
+    def _accept(self, delta, temperature):
+        if delta <= 0:
+            return True
+        if temperature <= 0:
+            return False
+        return self.rng.random() < math.exp(-delta / temperature)
+
+    def optimize(self, deadline_ms, max_iterations=None, start_temperature=3.0):
+        """Anneal until the deadline (measured from now), max_iterations or a
+        zero score. With max_iterations set the temperature follows the
+        iteration count instead of the clock, so a seeded run that finishes
+        within its deadline is reproducible. A run stopped by the deadline
+        depends on machine speed and is not; `stopped_by` says which it was.
+        """
+        start = time.perf_counter()
+        budget = max(deadline_ms, 0) / 1000.0
+        best_score = self.score
+        best_pos = list(self.pos)
+        iterations = 0
+        n = len(self.pos)
+        temperature = start_temperature
+        stopped_by = 'score'
+
+        while n and self.score > 0:
+            if iterations % 256 == 0:
+                elapsed = time.perf_counter() - start
+                if elapsed >= budget:
+                    stopped_by = 'deadline'
+                    break
+                if max_iterations is None:
+                    temperature = start_temperature * (1 - elapsed / budget)
+            if max_iterations is not None:
+                if iterations >= max_iterations:
+                    stopped_by = 'iterations'
+                    break
+                temperature = start_temperature * (1 - iterations / max_iterations)
+            iterations += 1
+
+            a = self.rng.randrange(n)
+            if self.rng.random() < 0.5:
+                b = self.rng.randrange(n)
+                if self.course[a] == self.course[b]:
+                    continue
+                self._try_swap(a, b, temperature)
+            else:
+                self._try_move(a, temperature)
+
+            if self.score < best_score:
+                best_score = self.score
+                best_pos = list(self.pos)
+
+        return {
+            'placement': best_pos,
+            'score': best_score,
+            'initial_score': self.initial_score,
+            'iterations': iterations,
+            'stopped_by': stopped_by,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
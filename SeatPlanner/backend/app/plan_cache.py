@@ -0,0 +1,57 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def placement_key(students, classrooms, strategy, seed, policy):
+    """Stable hash of everything that determines a generated placement.
+
+    `students` is an iterable of (id, course) and `classrooms` of
+    (id, rows, columns, capacity, blocked_mask); both are sorted so query
+    order does not matter. `policy` holds strategy-specific settings such as spacing values
+    or the optimizer's budget.
+    """
+    payload = {
+        'students': sorted([sid, course] for sid, course in students),
+        'classrooms': sorted(list(c) for c in classrooms),
+        'strategy': strategy,
+        'seed': seed,
+        'policy': policy
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class PlacementCache:
+    """Small thread-safe LRU of generated placements keyed by input hash.
+
+    Values are (placements, extra) where placements is a list of
+    (student_id, classroom_id, row_number, column_number) tuples.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+placement_cache = PlacementCache()
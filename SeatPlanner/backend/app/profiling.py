@@ -0,0 +1,251 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import g, request, jsonify
+from sqlalchemy import event
+from .models import db
+
+PROFILE_HEADER = 'X-Profile'
+TRUTHY_VALUES = {'1', 'true', 'yes', 'on'}
+
+# From 3.12 cProfile hooks into sys.monitoring, which is interpreter-wide: one
+# profiler at a time, and it records every thread, not just the caller's
+PROFILER_IS_PROCESS_WIDE = sys.version_info >= (3, 12)
+
+# Only one request is profiled at a time, per process
+_profile_lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval and counts the
+    stacks in collapsed form ("outer;inner;leaf"), ready for flamegraph.pl
+    or speedscope. Frames are named like pstats entries, by the line the
+    function starts on.
+    """
+
+    def __init__(self, target_ident, interval=0.001):
+        super().__init__(daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            # Once stop() is called the target is only waiting for this thread
+            if names and not self._stop_event.is_set():
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class SQLTimer:
+    """Times statements run on the profiled request's thread only"""
+
+    def __init__(self, engine, thread_ident):
+        self.engine = engine
+        self.thread_ident = thread_ident
+        self.count = 0
+        self.total = 0.0
+        self._started = {}
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self.thread_ident:
+            self._started[id(cursor)] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = self._started.pop(id(cursor), None)
+        if started is not None:
+            self.count += 1
+            self.total += time.perf_counter() - started
+
+    def start(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before)
+        event.listen(self.engine, 'after_cursor_execute', self._after)
+
+    def stop(self):
+        event.remove(self.engine, 'before_cursor_execute', self._before)
+        event.remove(self.engine, 'after_cursor_execute', self._after)
+
+
+def profiling_requested():
+    value = request.headers.get(PROFILE_HEADER) or request.args.get('profile') or ''
+    return value.strip().lower() in TRUTHY_VALUES
+
+
+def top_functions(profiler, limit):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f'{name} ({os.path.basename(filename)}:{line})',
+            'calls': calls,
+            'self_ms': round(tottime * 1000, 2),
+            'cumulative_ms': round(cumtime * 1000, 2)
+        })
+    rows.sort(key=lambda r: r['self_ms'], reverse=True)
+    return rows[:limit]
+
+
+def top_sampled_functions(sampler, elapsed, limit):
+    """Like top_functions, but estimated from the profiled thread's stack
+    samples, so other threads never show up. Call counts are unknown."""
+    total = sum(sampler.stacks.values())
+    if not total:
+        return []
+    per_sample_ms = elapsed * 1000 / total
+    self_samples = Counter()
+    cumulative_samples = Counter()
+    for stack, count in sampler.stacks.items():
+        frames = stack.split(';')
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            cumulative_samples[frame] += count
+    rows = [{
+        'function': function,
+        'calls': None,
+        'self_ms': round(self_samples[function] * per_sample_ms, 2),
+        'cumulative_ms': round(count * per_sample_ms, 2)
+    } for function, count in cumulative_samples.items()]
+    rows.sort(key=lambda r: (r['self_ms'], r['cumulative_ms']), reverse=True)
+    return rows[:limit]
+
+
+def _stop_profile():
+    """Stop everything _start_profile started and release the lock. Returns
+    (profiler, elapsed, sampler, sql), or None if nothing was running."""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return None
+    try:
+        profiler.disable()
+        elapsed = time.perf_counter() - g.pop('profile_started')
+        sampler = g.pop('profile_sampler')
+        sampler.stop()
+        sql = g.pop('profile_sql')
+        sql.stop()
+    finally:
+        _profile_lock.release()
+    return profiler, elapsed, sampler, sql
+
+
+def init_profiling(app):
+    """Per-request profiling for admins: add ?profile=1 or an X-Profile: 1 header.
+
+    The request runs under cProfile plus a 1 ms stack sampler. A .pstats file
+    and a .collapsed flamegraph file, named by endpoint and exam id, are
+    written to PROFILE_DIR. A summary of the top functions and SQL time is
+    added to JSON object responses and to the X-Profile-Summary header.
+    Streamed responses (such as /seating-events) are not profiled: their body
+    only runs after the request hooks, so nothing is dumped for them.
+
+    One request is profiled at a time per process; overlapping requests get
+    a 409. From Python 3.12 cProfile records every thread of the process, so
+    the .pstats file may include other requests served meanwhile and the
+    summary's top functions come from the thread's stack samples instead.
+    Requests without the switch only pay for the header/argument check.
+    """
+    app.config.setdefault('PROFILE_DIR', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'profiles'))
+    app.config.setdefault('PROFILE_TOP_FUNCTIONS', 10)
+
+    @app.before_request
+    def _start_profile():
+        if not profiling_requested():
+            return None
+
+        from .routes import get_current_user
+        user = get_current_user()
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required to profile requests'}), 403
+
+        if not _profile_lock.acquire(blocking=False):
+            return jsonify({'error': 'Profiling already in progress, try again shortly'}), 409
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Some other profiling tool owns the interpreter
+            _profile_lock.release()
+            return jsonify({'error': 'Profiling already in progress, try again shortly'}), 409
+
+        ident = threading.get_ident()
+        g.profiler = profiler
+        g.profile_started = time.perf_counter()
+        g.profile_sql = SQLTimer(db.engine, ident)
+        g.profile_sql.start()
+        g.profile_sampler = StackSampler(ident)
+        g.profile_sampler.start()
+        return None
+
+    @app.after_request
+    def _finish_profile(response):
+        stopped = _stop_profile()
+        if stopped is None:
+            return response
+        profiler, elapsed, sampler, sql = stopped
+
+        if response.is_streamed:
+            # The profile would only cover the setup before the stream starts
+            response.headers['X-Profile-Summary'] = 'skipped; streamed response'
+            return response
+
+        exam_id = (request.view_args or {}).get('exam_id')
+        endpoint = (request.endpoint or 'unknown').replace('.', '-')
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        name = f"{endpoint}-exam{exam_id}-{stamp}" if exam_id is not None else f"{endpoint}-{stamp}"
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        base = os.path.join(app.config['PROFILE_DIR'], name)
+        profiler.dump_stats(base + '.pstats')
+        with open(base + '.collapsed', 'w') as f:
+            f.write(sampler.collapsed())
+
+        summary = {
+            'total_ms': round(elapsed * 1000, 2),
+            'sql_ms': round(sql.total * 1000, 2),
+            'sql_statements': sql.count,
+            'files': [base + '.pstats', base + '.collapsed'],
+        }
+        limit = app.config['PROFILE_TOP_FUNCTIONS']
+        if PROFILER_IS_PROCESS_WIDE:
+            summary['top_functions'] = top_sampled_functions(sampler, elapsed, limit)
+            summary['top_functions_source'] = 'stack samples of this request'
+            summary['pstats_scope'] = 'whole process'
+        else:
+            summary['top_functions'] = top_functions(profiler, limit)
+            summary['top_functions_source'] = 'cProfile'
+            summary['pstats_scope'] = 'this request'
+        response.headers['X-Profile-Summary'] = (
+            f"total={summary['total_ms']}ms; sql={summary['sql_ms']}ms; "
+            f"statements={sql.count}; file={name}.pstats")
+
+        if response.is_json and not response.direct_passthrough:
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body['_profile'] = summary
+                response.set_data(json.dumps(body))
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # after_request is skipped when the view raises; don't leave the
+        # profiler, sampler thread, SQL listeners or lock held
+        _stop_profile()
@@ -1,7 +1,17 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from datetime import datetime, timedelta
-from sqlalchemy import text
-from .models import db, Student, Classroom, Exam, SeatingArrangement, User
+from sqlalchemy.orm import joinedload
+from .models import (db, missing_schema, Student, Classroom, ClassroomSeatMap, Exam, SeatingArrangement,
+                     User)
+from .timetable import parse_branches, schedule_subjects
+from .events import broker, diff_seating, format_sse
+from .compact import COMPACT_MIMETYPE, build_compact_plan, wants_compact
+from .optimizer import SeatingOptimizer
+from .plan_cache import placement_cache, placement_key
+from .counters import exam_branches, get_exam_counters, increment_eligible, refresh_exam_counters
+from .seatmap import (is_blocked, iter_cells, layout_from_mask, mask_from_cells, mask_from_layout,
+                      mask_to_bytes, row_bits)
+import queue
 import random
 from functools import wraps
 
@@ -44,6 +54,24 @@ main = Blueprint('main', __name__)
 def index():
     return jsonify({'message': 'Welcome to the Exam Seating Arrangement System API'})
 
+@main.route('/healthz')
+def healthz():
+    """Liveness: the worker is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@main.route('/readyz')
+def readyz():
+    """Readiness: the database is reachable and has every table and column
+    the models declare, i.e. init_db has been run for this version"""
+    try:
+        missing = missing_schema()
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+    if missing:
+        return jsonify({'status': 'unavailable', 'error': 'Database schema is out of date; run init_db.py',
+                        'missing': missing}), 503
+    return jsonify({'status': 'ready'})
+
 @main.route('/seating-plan/<int:exam_id>')
 def get_seating_plan(exam_id):
     try:
@@ -55,23 +83,40 @@ def get_seating_plan(exam_id):
             'exam_name': f"{exam.subject_code} - {exam.subject_name}",
             'date': exam.date.strftime('%Y-%m-%d'),
             'time_slot': exam.session,
+            'version': exam.plan_version,
             'classrooms': []
         }
         
+        # Load the whole plan with its students in one query, then group by room
+        arrangements = (SeatingArrangement.query
+                        .options(joinedload(SeatingArrangement.student))
+                        .filter_by(exam_id=exam_id)
+                        .order_by(SeatingArrangement.id)
+                        .all())
+        arrangements_by_classroom = {}
+        for arrangement in arrangements:
+            arrangements_by_classroom.setdefault(arrangement.classroom_id, []).append(arrangement)
+
+        if wants_compact(request):
+            compact = build_compact_plan(
+                {k: v for k, v in seating_data.items() if k != 'classrooms'},
+                classrooms, arrangements_by_classroom)
+            response = jsonify(compact)
+            response.mimetype = COMPACT_MIMETYPE
+            response.vary.add('Accept')
+            return response
+
         for classroom in classrooms:
-            arrangements = (SeatingArrangement.query
-                          .filter_by(exam_id=exam_id, classroom_id=classroom.id)
-                          .all())
-            
             classroom_data = {
                 'classroom_name': classroom.name,
                 'rows': classroom.rows,
                 'columns': classroom.columns,
+                'blocked_seats': [[r + 1, c + 1] for r, c in iter_cells(classroom.blocked_mask, classroom.columns)],
                 'seats': []
             }
             
-            for arrangement in arrangements:
-                student = Student.query.get(arrangement.student_id)
+            for arrangement in arrangements_by_classroom.get(classroom.id, ()):
+                student = arrangement.student
                 classroom_data['seats'].append({
                     'row': arrangement.row_number,
                     'column': arrangement.column_number,
@@ -80,51 +125,182 @@ def get_seating_plan(exam_id):
             
             seating_data['classrooms'].append(classroom_data)
         
-        return jsonify(seating_data)
+        response = jsonify(seating_data)
+        response.vary.add('Accept')
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Upper bound on one page of the available-students list
+MAX_PER_PAGE = 500
+
 @main.route('/available-students/<int:exam_id>')
 def get_available_students(exam_id):
+    """Eligible students without a seat for this exam.
+
+    Optional query parameters: q (roll number prefix or name substring),
+    page and per_page. Without per_page the whole list is returned. The
+    total number of matches is sent in the X-Total-Count header.
+    """
     try:
         exam = Exam.query.get_or_404(exam_id)
-        all_students = Student.query.filter(Student.course.in_(exam.branches.split(','))).all()
-        
-        # Get already assigned students
-        assigned_students = set(
-            db.session.query(SeatingArrangement.student_id)
-            .filter(SeatingArrangement.exam_id == exam_id)
-            .all()
-        )
-        
-        # Filter out assigned students
-        available_students = [
-            student.to_dict() for student in all_students 
-            if student.id not in assigned_students
-        ]
-        
-        return jsonify(available_students)
+
+        # Anti-join against this exam's seats instead of loading both sides
+        seated = (db.session.query(SeatingArrangement.id)
+                  .filter(SeatingArrangement.exam_id == exam_id,
+                          SeatingArrangement.student_id == Student.id))
+        query = Student.query.filter(Student.course.in_(exam_branches(exam)), ~seated.exists())
+
+        search = request.args.get('q', '').strip()
+        if search:
+            # autoescape makes % and _ in the search text match literally
+            query = query.filter(db.or_(Student.roll_number.startswith(search, autoescape=True),
+                                        Student.name.icontains(search, autoescape=True)))
+
+        total = query.count()
+        query = query.order_by(Student.roll_number)
+        per_page = request.args.get('per_page', type=int)
+        if per_page:
+            per_page = min(max(per_page, 1), MAX_PER_PAGE)
+            page = max(request.args.get('page', 1, type=int), 1)
+            query = query.limit(per_page).offset((page - 1) * per_page)
+
+        response = jsonify([student.to_dict() for student in query.all()])
+        response.headers['X-Total-Count'] = str(total)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@main.route('/exam-counters/<int:exam_id>')
+def get_exam_counters_route(exam_id):
+    """Eligible/assigned/remaining students per course for an exam"""
+    exam = Exam.query.get_or_404(exam_id)
+    counters = [c.to_dict() for c in get_exam_counters(exam)]
+    return jsonify({
+        'exam_id': exam.id,
+        'courses': counters,
+        'eligible': sum(c['eligible'] for c in counters),
+        'assigned': sum(c['assigned'] for c in counters),
+        'remaining': sum(c['remaining'] for c in counters)
+    })
+
+def current_seat_map(exam_id):
+    """Map student_id -> (classroom_name, row, column) for an exam's current plan"""
+    rows = (db.session.query(SeatingArrangement.student_id, Classroom.name,
+                             SeatingArrangement.row_number, SeatingArrangement.column_number)
+            .join(Classroom, Classroom.id == SeatingArrangement.classroom_id)
+            .filter(SeatingArrangement.exam_id == exam_id)
+            .all())
+    return {student_id: (name, row, column) for student_id, name, row, column in rows}
+
+# How often an event stream checks the stored plan version for writes made
+# by other worker processes, and how long it may stay silent before sending
+# a keep-alive comment
+VERSION_POLL_SECONDS = 2
+KEEPALIVE_SECONDS = 15
+
+def stored_plan_version(exam_id):
+    version = db.session.query(Exam.plan_version).filter(Exam.id == exam_id).scalar()
+    # Release the connection again until the next poll
+    db.session.close()
+    return version or 0
+
+def resync_message(exam_id, version):
+    return {'event': 'resync', 'version': version, 'data': {'exam_id': exam_id}}
+
+@main.route('/seating-events/<int:exam_id>')
+def seating_events(exam_id):
+    """Server-sent event stream of seating changes for one exam.
+
+    Emits `seats_changed` (assigned/moved/cleared seats) after an update,
+    `plan_regenerated` after generation and `resync` if the client fell too
+    far behind. Every event carries the exam's new plan version as its id.
+
+    Detailed events only reach streams served by the writing process. Every
+    stream also polls the stored plan version, so writes made by another
+    worker arrive as `resync` within VERSION_POLL_SECONDS. A reconnecting
+    client whose Last-Event-ID is older than the stored version is told to
+    resync straight away.
+    """
+    version = Exam.query.get_or_404(exam_id).plan_version
+    # Don't hold a database connection for the lifetime of the stream
+    db.session.close()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = broker.subscribe(exam_id)
+
+    def stream():
+        seen = version
+        try:
+            yield f"event: hello\ndata: {{\"exam_id\":{exam_id},\"version\":{version}}}\n\n"
+            if last_event_id is not None and last_event_id < version:
+                yield format_sse(resync_message(exam_id, version))
+            silent = 0
+            while True:
+                try:
+                    message = subscription.get(timeout=VERSION_POLL_SECONDS)
+                except queue.Empty:
+                    current = stored_plan_version(exam_id)
+                    if current > seen:
+                        seen = current
+                        silent = 0
+                        yield format_sse(resync_message(exam_id, current))
+                        continue
+                    silent += VERSION_POLL_SECONDS
+                    if silent >= KEEPALIVE_SECONDS:
+                        silent = 0
+                        # Comment line keeps proxies from closing an idle connection
+                        yield ': keep-alive\n\n'
+                    continue
+
+                silent = 0
+                if message['version'] <= seen:
+                    # Already covered by a resync sent from polling
+                    continue
+                if message['version'] > seen + 1 and message['event'] != 'resync':
+                    # Another worker wrote in between; a diff alone would be wrong
+                    message = resync_message(exam_id, message['version'])
+                seen = message['version']
+                yield format_sse(message)
+        finally:
+            broker.unsubscribe(exam_id, subscription)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @main.route('/update-seating/<int:exam_id>', methods=['POST'])
 @admin_required
 def update_seating(exam_id):
     try:
         data = request.get_json()
         exam = Exam.query.get_or_404(exam_id)
+        previous_seats = current_seat_map(exam_id)
+        new_seats = {}
 
         # First, remove all existing seating arrangements for this exam
         SeatingArrangement.query.filter_by(exam_id=exam_id).delete()
         
         # Create new seating arrangements based on the provided data
+        classrooms_by_name = {c.name: c for c in Classroom.query.all()}
+        arrangements = []
         for classroom_data in data['classrooms']:
-            classroom = Classroom.query.filter_by(name=classroom_data['classroom_name']).first()
+            classroom = classrooms_by_name.get(classroom_data['classroom_name'])
             if not classroom:
                 continue
                 
+            blocked = classroom.blocked_mask
             for seat in classroom_data['seats']:
                 if seat.get('student'):
+                    row, column = seat.get('row'), seat.get('column')
+                    if not (isinstance(row, int) and isinstance(column, int)
+                            and 1 <= row <= classroom.rows and 1 <= column <= classroom.columns):
+                        db.session.rollback()
+                        return jsonify({'error': f"Seat ({row!r}, {column!r}) is outside the "
+                                                 f"{classroom.rows}x{classroom.columns} room "
+                                                 f"{classroom.name}"}), 400
+                    if is_blocked(blocked, row - 1, column - 1, classroom.columns):
+                        db.session.rollback()
+                        return jsonify({'error': f"Seat ({seat['row']}, {seat['column']}) in "
+                                                 f"{classroom.name} is blocked"}), 400
                     arrangement = SeatingArrangement(
                         exam_id=exam_id,
                         student_id=seat['student']['id'],
@@ -132,10 +308,19 @@ def update_seating(exam_id):
                         row_number=seat['row'],
                         column_number=seat['column']
                     )
-                    db.session.add(arrangement)
+                    arrangements.append(arrangement)
+                    new_seats[seat['student']['id']] = (classroom.name, seat['row'], seat['column'])
         
+        db.session.bulk_save_objects(arrangements)
+        db.session.flush()
+        refresh_exam_counters(exam)
+        changes = diff_seating(previous_seats, new_seats)
+        version = exam.bump_plan_version() if changes else exam.plan_version
         db.session.commit()
-        return jsonify({'message': 'Seating arrangement updated successfully'})
+
+        if changes:
+            broker.publish(exam_id, version, 'seats_changed', {'changes': changes})
+        return jsonify({'message': 'Seating arrangement updated successfully', 'version': version})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -151,6 +336,7 @@ def handle_students():
             semester=data['semester']
         )
         db.session.add(new_student)
+        increment_eligible(new_student.course)
         db.session.commit()
         return jsonify({'message': 'Student added successfully'}), 201
     
@@ -217,9 +403,91 @@ def handle_classrooms():
         'name': c.name,
         'capacity': c.capacity,
         'rows': c.rows,
-        'columns': c.columns
+        'columns': c.columns,
+        'usable_capacity': c.usable_capacity
     } for c in classrooms])
 
+def seat_map_dict(classroom):
+    mask = classroom.blocked_mask
+    return {
+        'classroom_id': classroom.id,
+        'rows': classroom.rows,
+        'columns': classroom.columns,
+        'mask': mask_to_bytes(mask, classroom.rows, classroom.columns).hex(),
+        'blocked': [[r + 1, c + 1] for r, c in iter_cells(mask, classroom.columns)],
+        'layout': layout_from_mask(mask, classroom.rows, classroom.columns),
+        'usable_capacity': classroom.usable_capacity
+    }
+
+@main.route('/classrooms/<int:classroom_id>/seat-map', methods=['GET'])
+def get_seat_map(classroom_id):
+    """Blocked seats of a classroom as a hex mask, a 1-based list and a layout"""
+    classroom = Classroom.query.get_or_404(classroom_id)
+    return jsonify(seat_map_dict(classroom))
+
+@main.route('/classrooms/<int:classroom_id>/seat-map', methods=['PUT', 'DELETE'])
+@admin_required
+def edit_seat_map(classroom_id):
+    """Replace or clear a classroom's blocked seats.
+
+    PUT takes one of {blocked: [[row, column], ...]} (1-based),
+    {layout: ['..X..', ...]} with 'X' marking blocked seats, or {mask: hex}.
+    If existing plans seat students on seats being blocked, the PUT is
+    rejected with 409 and the affected exams and seats. With force=true the
+    map is saved anyway; the affected plans are listed in `invalidated_plans`,
+    their plan_version is bumped and live editors are sent `resync`.
+    """
+    classroom = Classroom.query.get_or_404(classroom_id)
+    if request.method == 'DELETE':
+        if classroom.seat_map is not None:
+            db.session.delete(classroom.seat_map)
+            db.session.commit()
+        return jsonify(seat_map_dict(classroom))
+
+    data = request.get_json() or {}
+    rows, columns = classroom.rows, classroom.columns
+    try:
+        if 'blocked' in data:
+            mask = mask_from_cells(data['blocked'], rows, columns)
+        elif 'layout' in data:
+            mask = mask_from_layout(data['layout'], rows, columns)
+        elif 'mask' in data:
+            mask = int.from_bytes(bytes.fromhex(data['mask']), 'little')
+            if mask >> (rows * columns):
+                raise ValueError(f'Mask has bits beyond the {rows}x{columns} room')
+        else:
+            return jsonify({'error': 'Provide blocked, layout or mask'}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Seats of existing plans that the new mask would block
+    conflicts = {}
+    occupied = (db.session.query(SeatingArrangement.exam_id, SeatingArrangement.student_id,
+                                 SeatingArrangement.row_number, SeatingArrangement.column_number)
+                .filter(SeatingArrangement.classroom_id == classroom.id)
+                .order_by(SeatingArrangement.exam_id, SeatingArrangement.row_number,
+                          SeatingArrangement.column_number)
+                .all())
+    for exam_id, student_id, row, column in occupied:
+        if 1 <= row <= rows and 1 <= column <= columns and is_blocked(mask, row - 1, column - 1, columns):
+            conflicts.setdefault(exam_id, []).append({'row': row, 'column': column, 'student_id': student_id})
+    conflicts = [{'exam_id': exam_id, 'seats': seats} for exam_id, seats in conflicts.items()]
+    if conflicts and not data.get('force'):
+        return jsonify({'error': 'Students are seated on seats that would be blocked; '
+                                 'move them first or pass force=true',
+                        'conflicts': conflicts}), 409
+
+    if classroom.seat_map is None:
+        classroom.seat_map = ClassroomSeatMap(classroom_id=classroom.id)
+    classroom.seat_map.blocked = mask_to_bytes(mask, rows, columns)
+    versions = Exam.bump_plan_versions([c['exam_id'] for c in conflicts])
+    db.session.commit()
+
+    # The affected plans now break the seat map; have live editors reload them
+    for exam_id, version in versions.items():
+        broker.publish(exam_id, version, 'resync', {'reason': 'seat_map_changed'})
+    return jsonify(dict(seat_map_dict(classroom), invalidated_plans=conflicts))
+
 def check_exam_conflicts(exam_date, duration, session, branches, existing_exam_id=None):
     """Check for exam time conflicts"""
     new_start_time = exam_date
@@ -255,16 +523,25 @@ def get_exam_conflicts(exam_id):
     
     # Find students with conflicts
     conflicts = []
-    overlapping_exams = check_exam_conflicts(exam.date, exam.duration, exam.session, exam.id)
+    overlapping_exams = check_exam_conflicts(exam.date, exam.duration, exam.session,
+                                             exam.branches, existing_exam_id=exam.id)
+
+    # Find students seated for this exam and any overlapping one in a single query
+    this_exam_students = (db.session.query(SeatingArrangement.student_id)
+                          .filter(SeatingArrangement.exam_id == exam_id))
+    students_by_exam = {}
+    if overlapping_exams:
+        rows = (db.session.query(SeatingArrangement.exam_id, Student)
+                .join(Student, Student.id == SeatingArrangement.student_id)
+                .filter(SeatingArrangement.exam_id.in_([e.id for e in overlapping_exams]),
+                        SeatingArrangement.student_id.in_(this_exam_students))
+                .order_by(Student.id)
+                .all())
+        for other_exam_id, student in rows:
+            students_by_exam.setdefault(other_exam_id, []).append(student)
     
     for other_exam in overlapping_exams:
-        # Find students scheduled for both exams
-        conflicting_students = db.session.query(Student).\
-            join(SeatingArrangement, Student.id == SeatingArrangement.student_id).\
-            filter(SeatingArrangement.exam_id.in_([exam_id, other_exam.id])).\
-            group_by(Student.id).\
-            having(db.func.count(Student.id) > 1).\
-            all()
+        conflicting_students = students_by_exam.get(other_exam.id, [])
         
         if conflicting_students:
             conflicts.append({
@@ -342,22 +619,121 @@ def handle_exams():
         'branches': e.branches
     } for e in exams])
 
+# Start time for each session, matching what the frontend sends for new exams
+SESSION_START_HOURS = {'Morning': 9, 'Afternoon': 14, 'Evening': 18}
+
+@main.route('/exams/timetable', methods=['POST'])
+@admin_required
+def generate_timetable():
+    """Assign a batch of subjects to conflict-free (date, session) slots.
+
+    Expects JSON {subjects: [{subject_code, subject_name, branches, duration}],
+    dates: ['YYYY-MM-DD', ...], sessions: ['Morning', ...], commit: bool}.
+    Existing exams are treated as fixed. With commit=true the scheduled exams
+    are created, otherwise the proposed timetable is only returned.
+    """
+    data = request.get_json() or {}
+    subjects = data.get('subjects') or []
+    sessions = data.get('sessions') or ['Morning', 'Afternoon']
+    try:
+        dates = [datetime.strptime(d, '%Y-%m-%d') for d in data.get('dates') or []]
+    except ValueError:
+        return jsonify({'error': 'dates must be in YYYY-MM-DD format'}), 400
+
+    if not subjects:
+        return jsonify({'error': 'No subjects provided'}), 400
+    if not dates:
+        return jsonify({'error': 'No dates provided'}), 400
+    unknown = [s for s in sessions if s not in SESSION_START_HOURS]
+    if unknown:
+        return jsonify({'error': f'Unknown sessions: {", ".join(unknown)}'}), 400
+
+    slots = [(d, s) for d in dates for s in sessions]
+    slot_index = {(d.date(), s): i for i, (d, s) in enumerate(slots)}
+    slot_capacity = sum(c.usable_capacity for c in Classroom.query.all())
+
+    # Seats needed per subject = number of students across its branches
+    students_per_course = dict(
+        db.session.query(Student.course, db.func.count(Student.id)).group_by(Student.course).all()
+    )
+
+    problem = []
+    for subject in subjects:
+        branches = parse_branches(subject.get('branches', ''))
+        if not branches or not subject.get('subject_code'):
+            return jsonify({'error': 'Each subject needs subject_code and branches'}), 400
+        problem.append({
+            'branches': branches,
+            'demand': sum(students_per_course.get(b, 0) for b in branches)
+        })
+
+    # Existing exams occupy their slot's branches and seats
+    blocked = {}
+    for exam in Exam.query.filter(Exam.date >= min(dates),
+                                  Exam.date < max(dates) + timedelta(days=1)).all():
+        index = slot_index.get((exam.date.date(), exam.session))
+        if index is None:
+            continue
+        branches = parse_branches(exam.branches)
+        seats = sum(students_per_course.get(b, 0) for b in branches)
+        prev_branches, prev_seats = blocked.get(index, (set(), 0))
+        blocked[index] = (prev_branches | branches, prev_seats + seats)
+
+    assignment, unscheduled = schedule_subjects(problem, len(slots), slot_capacity,
+                                                blocked=blocked, seed=data.get('seed', 0))
+
+    scheduled = []
+    new_exams = []
+    for subject, slot in zip(subjects, assignment):
+        if slot is None:
+            continue
+        day, session = slots[slot]
+        exam_date = day.replace(hour=SESSION_START_HOURS[session])
+        scheduled.append({
+            'subject_code': subject['subject_code'],
+            'subject_name': subject.get('subject_name', subject['subject_code']),
+            'date': exam_date.strftime('%Y-%m-%dT%H:%M'),
+            'duration': subject.get('duration', 180),
+            'session': session,
+            'branches': subject['branches'] if isinstance(subject['branches'], str)
+                        else ','.join(subject['branches'])
+        })
+        new_exams.append(Exam(
+            subject_code=scheduled[-1]['subject_code'],
+            subject_name=scheduled[-1]['subject_name'],
+            date=exam_date,
+            duration=scheduled[-1]['duration'],
+            session=session,
+            branches=scheduled[-1]['branches']
+        ))
+
+    if data.get('commit') and new_exams:
+        db.session.add_all(new_exams)
+        db.session.commit()
+
+    return jsonify({
+        'scheduled': scheduled,
+        'unscheduled': [subjects[i]['subject_code'] for i in unscheduled],
+        'slot_capacity': slot_capacity,
+        'committed': bool(data.get('commit')) and bool(new_exams)
+    })
+
 def calculate_classroom_capacities(classrooms, total_students):
     """Calculate how many students should be in each classroom for uniform distribution"""
-    total_capacity = sum(c.capacity for c in classrooms)
+    total_capacity = sum(c.usable_capacity for c in classrooms)
     distributions = {}
     remaining_students = total_students
     
     for classroom in classrooms:
         # Calculate proportional allocation
-        allocation = int((classroom.capacity / total_capacity) * total_students)
+        allocation = int((classroom.usable_capacity / total_capacity) * total_students)
         distributions[classroom.id] = min(allocation, remaining_students)
         remaining_students -= distributions[classroom.id]
     
     # Distribute any remaining students
     if remaining_students > 0:
         for classroom in classrooms:
-            available_space = classroom.capacity - distributions[classroom.id]
+            available_space = classroom.usable_capacity - distributions[classroom.id]
             if available_space > 0:
                 allocation = min(available_space, remaining_students)
                 distributions[classroom.id] += allocation
@@ -367,10 +743,15 @@ def calculate_classroom_capacities(classrooms, total_students):
     
     return distributions
 
-def is_valid_seat(grid, row, col, course, spacing):
-    """Check if a seat is valid considering course and spacing requirements"""
+def is_valid_seat(grid, row, col, course, spacing, blocked=0):
+    """Check if a seat is valid considering course and spacing requirements.
+
+    `blocked` is the room's packed seat mask; blocked seats are never valid.
+    """
     rows = len(grid)
     cols = len(grid[0]) if rows > 0 else 0
+    if is_blocked(blocked, row, col, cols):
+        return False
     
     # Check surrounding seats within spacing distance
     for dx in range(-spacing, spacing + 1):
@@ -389,13 +770,22 @@ def is_valid_seat(grid, row, col, course, spacing):
                     return False
     return True
 
-def find_optimal_seat(grid, rows, cols, course, spacing):
-    """Find the best available seat maximizing distance from other students"""
+def find_optimal_seat(grid, rows, cols, course, spacing, blocked=0):
+    """Find the best available seat maximizing distance from other students.
+
+    Candidate seats are walked bit by bit from the complement of the room's
+    blocked mask, so blocked seats are never visited.
+    """
     best_score = -1
     best_position = None
+    row_full = (1 << cols) - 1
     
     for row in range(rows):
-        for col in range(cols):
+        open_seats = ~row_bits(blocked, row, cols) & row_full
+        while open_seats:
+            low = open_seats & -open_seats
+            open_seats ^= low
+            col = low.bit_length() - 1
             if grid[row][col] is None and is_valid_seat(grid, row, col, course, spacing):
                 # Calculate score based on distance to other occupied seats
                 score = 0
@@ -411,15 +801,97 @@ def find_optimal_seat(grid, rows, cols, course, spacing):
     
     return best_position
 
+# Upper bound on the optimizer's time budget so one request cannot hog a worker
+MAX_DEADLINE_MS = 30000
+
+# Spacing values the greedy strategy tries, widest first
+GREEDY_SPACING_VALUES = [2, 1]
+
+def save_generated_plan(exam, placements, total_students, preview=False, **extra):
+    """Persist a generated plan, notify live editors and build the response.
+
+    `placements` is a list of (student_id, classroom_id, row_number,
+    column_number). With preview=True nothing is written and the seats are
+    returned instead.
+    """
+    body = dict({
+        'students_placed': len(placements),
+        'total_students': total_students
+    }, **extra)
+
+    if preview:
+        body['message'] = f'Seating arrangement preview for {len(placements)} students'
+        body['seats'] = [{
+            'student_id': student_id,
+            'classroom_id': classroom_id,
+            'row': row,
+            'column': column
+        } for student_id, classroom_id, row, column in placements]
+        return jsonify(body)
+
+    # Clear existing seating arrangements
+    SeatingArrangement.query.filter_by(exam_id=exam.id).delete()
+    db.session.bulk_save_objects([
+        SeatingArrangement(
+            exam_id=exam.id,
+            student_id=student_id,
+            classroom_id=classroom_id,
+            row_number=row,
+            column_number=column
+        )
+        for student_id, classroom_id, row, column in placements
+    ])
+    db.session.flush()
+    refresh_exam_counters(exam)
+    version = exam.bump_plan_version()
+    db.session.commit()
+
+    broker.publish(exam.id, version, 'plan_regenerated', {'students_placed': len(placements)})
+    body['message'] = f'Seating arrangement generated for {len(placements)} students'
+    body['version'] = version
+    return jsonify(body)
+
 @main.route('/generate-seating/<int:exam_id>', methods=['POST'])
 @admin_required
 def generate_seating(exam_id):
+    """Generate a seating plan.
+
+    Optional JSON body: {strategy: 'greedy' | 'optimize', deadline_ms: int,
+    max_iterations: int, seed: int, preview: bool}.
+    The 'optimize' strategy runs simulated annealing for at most deadline_ms
+    (default 500) and returns the best plan found within that budget.
+
+    Greedy plans depend only on the inputs and seed (default 0). An optimize
+    run is reproducible only if it ends by reaching max_iterations (or a zero
+    score) before the deadline; one cut off by deadline_ms depends on machine
+    speed, and its `optimization.stopped_by` is 'deadline'. Results are
+    cached in-process by a hash of the inputs, so regenerating or previewing
+    an unchanged exam is instant. With preview=true the plan is returned but
+    not saved.
+    """
+    options = request.get_json(silent=True) or {}
+    strategy = options.get('strategy', 'greedy')
+    if strategy not in ('greedy', 'optimize'):
+        return jsonify({'error': f'Unknown strategy: {strategy}'}), 400
+    try:
+        deadline_ms = min(max(int(options.get('deadline_ms', 500)), 0), MAX_DEADLINE_MS)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'deadline_ms must be an integer'}), 400
+    try:
+        seed = int(options.get('seed', 0))
+        max_iterations = options.get('max_iterations')
+        max_iterations = int(max_iterations) if max_iterations is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seed and max_iterations must be integers'}), 400
+    preview = bool(options.get('preview', False))
+
     exam = Exam.query.get_or_404(exam_id)
     
     # Get eligible students based on exam branches
     eligible_branches = [branch.strip() for branch in exam.branches.split(',')]
-    students = Student.query.filter(Student.course.in_(eligible_branches)).all()
-    classrooms = Classroom.query.all()
+    students = (Student.query.filter(Student.course.in_(eligible_branches))
+                .order_by(Student.id).all())
+    classrooms = Classroom.query.order_by(Classroom.id).all()
     
     if not students:
         return jsonify({'error': 'No eligible students found for this exam'}), 404
@@ -427,25 +899,26 @@ def generate_seating(exam_id):
     if not classrooms:
         return jsonify({'error': 'No classrooms available'}), 404
     
-    total_capacity = sum(c.capacity for c in classrooms)
+    total_capacity = sum(c.usable_capacity for c in classrooms)
     if len(students) > total_capacity:
         return jsonify({'error': f'Not enough seats for all students. Need {len(students)} seats but only {total_capacity} available'}), 400
     
-    # Get already assigned students for this exam
-    assigned_student_ids = set(
-        db.session.query(SeatingArrangement.student_id)
-        .filter(SeatingArrangement.exam_id == exam_id)
-        .all()
+    # The whole plan is regenerated: save_generated_plan replaces every seat
+    # of this exam, so the key covers all eligible students
+    if strategy == 'optimize':
+        policy = {'deadline_ms': deadline_ms, 'max_iterations': max_iterations}
+    else:
+        policy = {'spacing_values': GREEDY_SPACING_VALUES}
+    cache_key = placement_key(
+        [(s.id, s.course) for s in students],
+        [(c.id, c.rows, c.columns, c.capacity, c.blocked_mask) for c in classrooms],
+        strategy, seed, policy
     )
-    
-    # Filter out already assigned students
-    students = [s for s in students if s.id not in assigned_student_ids]
-    
-    if not students:
-        return jsonify({'message': 'All eligible students are already assigned seats'}), 200
-    
-    # Clear existing seating arrangements
-    SeatingArrangement.query.filter_by(exam_id=exam_id).delete()
+    cached = placement_cache.get(cache_key)
+    if cached is not None:
+        placements, extra = cached
+        return save_generated_plan(exam, placements, len(students), preview=preview,
+                                   seed=seed, cached=True, **extra)
     
     # Calculate optimal distribution across classrooms
     distributions = calculate_classroom_capacities(classrooms, len(students))
@@ -457,8 +930,9 @@ def generate_seating(exam_id):
             students_by_course[student.course] = []
         students_by_course[student.course].append(student)
     
+    rng = random.Random(seed)
     for course in students_by_course:
-        random.shuffle(students_by_course[course])
+        rng.shuffle(students_by_course[course])
     
     # Create alternating list of students from different courses
     distributed_students = []
@@ -470,6 +944,29 @@ def generate_seating(exam_id):
     
     if not distributed_students:
         return jsonify({'error': 'No students to allocate'}), 400
+
+    if strategy == 'optimize':
+        rooms = [(c.id, c.rows, c.columns) for c in classrooms]
+        try:
+            optimizer = SeatingOptimizer(rooms, distributions, [s.course for s in distributed_students],
+                                         seed=seed, blocked={c.id: c.blocked_mask for c in classrooms})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        result = optimizer.optimize(deadline_ms, max_iterations=max_iterations)
+        placements = [
+            (distributed_students[index].id, rooms[room][0], row + 1, col + 1)
+            for index, (room, row, col) in enumerate(result['placement'])
+        ]
+        extra = {'optimization': {
+            'score': result['score'],
+            'initial_score': result['initial_score'],
+            'iterations': result['iterations'],
+            'stopped_by': result['stopped_by'],
+            'elapsed_ms': result['elapsed_ms']
+        }}
+        placement_cache.put(cache_key, (placements, extra))
+        return save_generated_plan(exam, placements, len(distributed_students), preview=preview,
+                                   seed=seed, cached=False, **extra)
         
     # Initialize arrangement data
     arrangements = []
@@ -480,11 +977,12 @@ def generate_seating(exam_id):
         classroom_grids[classroom.id] = {
             'grid': [[None for _ in range(classroom.columns)] for _ in range(classroom.rows)],
             'allocated': 0,
-            'target': distributions[classroom.id]
+            'target': distributions[classroom.id],
+            'blocked': classroom.blocked_mask
         }
     
     # Try different spacing values, starting with maximum
-    spacing_values = [2, 1]  # Start with 2 seat gap, then try 1 if needed
+    spacing_values = GREEDY_SPACING_VALUES  # Start with 2 seat gap, then try 1 if needed
     success = False
     
     for spacing in spacing_values:
@@ -514,7 +1012,8 @@ def generate_seating(exam_id):
                     classroom.rows,
                     classroom.columns,
                     current_student.course,
-                    spacing
+                    spacing,
+                    grid_info['blocked']
                 )
                 
                 if position:
@@ -558,15 +1057,10 @@ def generate_seating(exam_id):
                     f'Allocated {student_index} out of {len(distributed_students)} students.'
         }), 400
     
-    # Save all arrangements
-    db.session.bulk_save_objects(arrangements)
-    db.session.commit()
-    
-    return jsonify({
-        'message': f'Seating arrangement generated for {len(arrangements)} students',
-        'students_placed': len(arrangements),
-        'total_students': len(distributed_students)
-    })
+    placements = [(a.student_id, a.classroom_id, a.row_number, a.column_number) for a in arrangements]
+    placement_cache.put(cache_key, (placements, {}))
+    return save_generated_plan(exam, placements, len(distributed_students), preview=preview,
+                               seed=seed, cached=False)
     
     for classroom in classrooms:
         if student_index >= len(distributed_students):
@@ -647,7 +1141,11 @@ def generate_seating(exam_id):
 @main.route('/seating-arrangement/<int:exam_id>', methods=['GET'])
 def get_seating_arrangement(exam_id):
     exam = Exam.query.get_or_404(exam_id)
-    arrangements = SeatingArrangement.query.filter_by(exam_id=exam_id).all()
+    arrangements = (SeatingArrangement.query
+                    .options(joinedload(SeatingArrangement.student),
+                             joinedload(SeatingArrangement.classroom))
+                    .filter_by(exam_id=exam_id)
+                    .all())
     
     # Group arrangements by classroom
     classroom_arrangements = {}
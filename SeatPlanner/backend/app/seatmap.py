@@ -0,0 +1,68 @@
+"""Packed seat masks for irregular room layouts.
+
+A room's blocked seats (pillars, aisles, broken benches) are kept as one
+integer with bit `row * columns + column` set for every unusable seat, using
+0-based coordinates. It is stored little-endian as bytes on ClassroomSeatMap.
+"""
+
+BLOCKED_CHARS = set('X#')
+OPEN_CHARS = set('.O')
+
+
+def full_mask(rows, columns):
+    return (1 << (rows * columns)) - 1
+
+
+def mask_to_bytes(mask, rows, columns):
+    return (mask & full_mask(rows, columns)).to_bytes((rows * columns + 7) // 8, 'little')
+
+
+def mask_from_bytes(data, rows, columns):
+    return int.from_bytes(data or b'', 'little') & full_mask(rows, columns)
+
+
+def mask_from_cells(cells, rows, columns):
+    """Build a mask from 1-based (row, column) pairs"""
+    mask = 0
+    for row, column in cells:
+        if not (1 <= row <= rows and 1 <= column <= columns):
+            raise ValueError(f'Seat ({row}, {column}) is outside a {rows}x{columns} room')
+        mask |= 1 << ((row - 1) * columns + (column - 1))
+    return mask
+
+
+def mask_from_layout(layout, rows, columns):
+    """Build a mask from one string per row, 'X' or '#' for blocked and '.' for open"""
+    if len(layout) != rows or any(len(line) != columns for line in layout):
+        raise ValueError(f'Layout must have {rows} rows of {columns} characters')
+    mask = 0
+    for row, line in enumerate(layout):
+        for column, char in enumerate(line):
+            if char in BLOCKED_CHARS:
+                mask |= 1 << (row * columns + column)
+            elif char not in OPEN_CHARS:
+                raise ValueError(f'Unexpected layout character {char!r}')
+    return mask
+
+
+def row_bits(mask, row, columns):
+    """The `columns` bits of one row, bit c set for column c"""
+    return (mask >> (row * columns)) & ((1 << columns) - 1)
+
+
+def is_blocked(mask, row, column, columns):
+    return (mask >> (row * columns + column)) & 1 == 1
+
+
+def iter_cells(mask, columns):
+    """Yield 0-based (row, column) for every set bit, lowest first"""
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        yield divmod(index, columns)
+        mask ^= low
+
+
+def layout_from_mask(mask, rows, columns):
+    return [''.join('X' if is_blocked(mask, r, c, columns) else '.' for c in range(columns))
+            for r in range(rows)]
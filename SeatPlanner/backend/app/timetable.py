@@ -0,0 +1,182 @@
+import random
+from collections import defaultdict
+
+
+def parse_branches(branches):
+    """Normalise a comma-separated branch string (or list) into a set"""
+    if isinstance(branches, str):
+        branches = branches.split(',')
+    return set(b.strip() for b in branches if b and b.strip())
+
+
+def build_clash_graph(subjects):
+    """Build adjacency sets between subjects that share at least one branch.
+
+    Subjects are bucketed by branch first so the cost is proportional to the
+    number of actual clashes rather than every pair of subjects.
+    """
+    by_branch = defaultdict(list)
+    for index, subject in enumerate(subjects):
+        for branch in subject['branches']:
+            by_branch[branch].append(index)
+
+    graph = [set() for _ in subjects]
+    for members in by_branch.values():
+        for i in members:
+            graph[i].update(members)
+    for index, neighbours in enumerate(graph):
+        neighbours.discard(index)
+    return graph
+
+
+class TimetableSolver:
+    """Assign subjects to (date, session) slots without branch clashes.
+
+    `subjects` is a list of dicts with `branches` (a set) and `demand` (seats
+    needed). `slot_capacity` is the number of seats available per slot and
+    `blocked` optionally maps a slot index to (branches, seats) already taken
+    by existing exams.
+    """
+
+    def __init__(self, subjects, num_slots, slot_capacity, blocked=None, seed=0):
+        self.subjects = subjects
+        self.num_slots = num_slots
+        self.slot_capacity = slot_capacity
+        self.graph = build_clash_graph(subjects)
+        self.rng = random.Random(seed)
+
+        self.blocked_branches = [set() for _ in range(num_slots)]
+        self.blocked_seats = [0] * num_slots
+        for slot, (branches, seats) in (blocked or {}).items():
+            self.blocked_branches[slot] |= branches
+            self.blocked_seats[slot] += seats
+
+        self.assignment = [None] * len(subjects)
+        self.slot_members = [set() for _ in range(num_slots)]
+        self.slot_load = list(self.blocked_seats)
+
+    def _place(self, subject, slot):
+        self.assignment[subject] = slot
+        self.slot_members[slot].add(subject)
+        self.slot_load[slot] += self.subjects[subject]['demand']
+
+    def _remove(self, subject):
+        slot = self.assignment[subject]
+        self.assignment[subject] = None
+        self.slot_members[slot].discard(subject)
+        self.slot_load[slot] -= self.subjects[subject]['demand']
+
+    def _is_free(self, subject, slot):
+        if self.subjects[subject]['branches'] & self.blocked_branches[slot]:
+            return False
+        if self.slot_load[slot] + self.subjects[subject]['demand'] > self.slot_capacity:
+            return False
+        return not (self.graph[subject] & self.slot_members[slot])
+
+    def colour(self):
+        """DSATUR greedy: always place the subject with the fewest usable slots"""
+        unplaced = set(range(len(self.subjects)))
+        saturation = [set() for _ in self.subjects]
+        failed = []
+
+        while unplaced:
+            subject = max(unplaced, key=lambda s: (len(saturation[s]),
+                                                   len(self.graph[s]),
+                                                   self.subjects[s]['demand']))
+            unplaced.discard(subject)
+
+            # Prefer the least loaded free slot so exams spread across the calendar
+            free = [slot for slot in range(self.num_slots)
+                    if slot not in saturation[subject] and self._is_free(subject, slot)]
+            if not free:
+                failed.append(subject)
+                continue
+            slot = min(free, key=lambda s: (self.slot_load[s], s))
+            self._place(subject, slot)
+            for neighbour in self.graph[subject]:
+                saturation[neighbour].add(slot)
+
+        return failed
+
+    def repair(self, pending, max_steps):
+        """Min-conflicts local search: move an unplaced subject into the slot
+        that evicts the fewest others, until nothing is pending or the step
+        budget runs out. Keeps and returns the best solution seen.
+        """
+        pending = list(pending)
+        impossible = []
+        best_assignment = list(self.assignment)
+        best_pending = list(pending)
+        tabu = {}
+
+        for step in range(max_steps):
+            if not pending:
+                break
+            subject = pending.pop(self.rng.randrange(len(pending)))
+            info = self.subjects[subject]
+
+            candidates = []
+            for slot in range(self.num_slots):
+                if info['branches'] & self.blocked_branches[slot]:
+                    continue
+                if self.blocked_seats[slot] + info['demand'] > self.slot_capacity:
+                    continue
+                clashes = self.graph[subject] & self.slot_members[slot]
+                freed = sum(self.subjects[c]['demand'] for c in clashes)
+                overflow = self.slot_load[slot] - freed + info['demand'] > self.slot_capacity
+                cost = len(clashes) + (1 if overflow else 0)
+                if tabu.get((subject, slot), -1) >= step:
+                    cost += len(self.subjects)
+                candidates.append((cost, self.rng.random(), slot, clashes))
+            if not candidates:
+                # Blocked by existing exams or larger than any slot; cannot be placed
+                impossible.append(subject)
+                continue
+
+            _, _, slot, clashes = min(candidates)
+            evicted = list(clashes)
+            for other in evicted:
+                self._remove(other)
+
+            # Free up seats by evicting the largest members until the subject fits
+            while self.slot_load[slot] + info['demand'] > self.slot_capacity:
+                other = max(self.slot_members[slot], key=lambda s: self.subjects[s]['demand'])
+                self._remove(other)
+                evicted.append(other)
+
+            self._place(subject, slot)
+            for other in evicted:
+                tabu[(other, slot)] = step + 7
+                pending.append(other)
+
+            if len(pending) < len(best_pending):
+                best_assignment = list(self.assignment)
+                best_pending = list(pending)
+
+        if len(pending) > len(best_pending):
+            self._restore(best_assignment)
+            pending = best_pending
+        return sorted(set(pending) | set(impossible))
+
+    def _restore(self, assignment):
+        self.assignment = [None] * len(self.subjects)
+        self.slot_members = [set() for _ in range(self.num_slots)]
+        self.slot_load = list(self.blocked_seats)
+        for subject, slot in enumerate(assignment):
+            if slot is not None:
+                self._place(subject, slot)
+
+    def solve(self, max_repair_steps=None):
+        failed = self.colour()
+        if failed:
+            if max_repair_steps is None:
+                max_repair_steps = 50 * len(self.subjects)
+            failed = self.repair(failed, max_repair_steps)
+        return self.assignment, failed
+
+
+def schedule_subjects(subjects, num_slots, slot_capacity, blocked=None, seed=0,
+                      max_repair_steps=None):
+    """Convenience wrapper returning (assignment, unscheduled indices)"""
+    solver = TimetableSolver(subjects, num_slots, slot_capacity, blocked=blocked, seed=seed)
+    return solver.solve(max_repair_steps=max_repair_steps)
@@ -0,0 +1,53 @@
+import argparse
+import random
+import time
+from app.timetable import TimetableSolver
+
+parser = argparse.ArgumentParser(description='Benchmark the exam timetable scheduler on a synthetic semester')
+parser.add_argument('--subjects', type=int, default=300, help='Number of subjects to schedule')
+parser.add_argument('--branches', type=int, default=24, help='Number of branches')
+parser.add_argument('--days', type=int, default=15, help='Number of exam days')
+parser.add_argument('--sessions', type=int, default=2, help='Sessions per day')
+parser.add_argument('--students', type=int, default=60, help='Students per branch')
+parser.add_argument('--capacity', type=int, default=1200, help='Seats available per slot')
+parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+branches = [f'BR{i:02d}' for i in range(args.branches)]
+
+# Most subjects belong to one branch, a few are shared across two or three
+subjects = []
+for _ in range(args.subjects):
+    chosen = set(rng.sample(branches, rng.choice([1, 1, 1, 2, 3])))
+    subjects.append({'branches': chosen, 'demand': args.students * len(chosen)})
+
+num_slots = args.days * args.sessions
+
+# Simple lower bounds: the busiest branch needs one slot per subject, and
+# total demand has to fit across all slots
+branch_load = max(sum(1 for s in subjects if b in s['branches']) for b in branches)
+total_demand = sum(s['demand'] for s in subjects)
+solver = TimetableSolver(subjects, num_slots, args.capacity, seed=args.seed)
+
+start = time.perf_counter()
+failed = solver.colour()
+colour_time = time.perf_counter() - start
+colour_failed = len(failed)
+if failed:
+    failed = solver.repair(failed, 50 * len(subjects))
+total_time = time.perf_counter() - start
+
+# Sanity check: no clashes and no slot over capacity
+for slot in range(num_slots):
+    seen = set()
+    for subject in solver.slot_members[slot]:
+        assert not (seen & subjects[subject]['branches']), 'branch clash in slot'
+        seen |= subjects[subject]['branches']
+    assert solver.slot_load[slot] <= args.capacity, 'slot over capacity'
+
+print(f"subjects={args.subjects} slots={num_slots} capacity/slot={args.capacity}")
+print(f"busiest branch needs {branch_load} slots, demand fills "
+      f"{total_demand / (num_slots * args.capacity):.0%} of seats")
+print(f"colouring:  {colour_time * 1000:.1f} ms, {colour_failed} left for repair")
+print(f"total:      {total_time * 1000:.1f} ms, {len(failed)} unscheduled")
@@ -0,0 +1,201 @@
+"""Query-budget regression check for every route on the main blueprint.
+
+Seeds two databases of different sizes, calls each route against both while
+counting the SQL statements it executes, and fails if a route issues more
+statements on the larger dataset (an N+1 in the making) or more than its
+declared budget. New routes must be added to ROUTE_BUDGETS.
+
+Usage: python check_query_budget.py [--small 30] [--large 120] [-v]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, init_db
+from app.models import db, Student, Classroom, Exam, SeatingArrangement, User
+
+ADMIN = {'X-User': 'budget-admin'}
+COURSES = ['CSE', 'IT', 'ECE']
+
+# (endpoint, method) -> (path, headers, json body factory or None, statement budget).
+# Routes that cannot be exercised by a request/response round trip map to None.
+ROUTE_BUDGETS = {
+    ('main.index', 'GET'): ('/', {}, None, 0),
+    ('main.healthz', 'GET'): ('/healthz', {}, None, 0),
+    # Table list plus one column lookup per model table
+    ('main.readyz', 'GET'): ('/readyz', {}, None, 8),
+    ('main.get_seating_plan', 'GET'): ('/seating-plan/1', {}, None, 3),
+    ('main.get_seating_plan', 'GET compact'): ('/seating-plan/1?format=compact', {}, None, 3),
+    ('main.get_seating_arrangement', 'GET'): ('/seating-arrangement/1', {}, None, 2),
+    ('main.get_available_students', 'GET'): ('/available-students/1', {}, None, 3),
+    ('main.get_available_students', 'GET page'): ('/available-students/1?per_page=20&q=20', {}, None, 3),
+    # First read builds the counters for an exam seeded without them
+    ('main.get_exam_counters_route', 'GET'): ('/exam-counters/1', {}, None, 9),
+    ('main.get_exam_counters_route', 'GET warm'): ('/exam-counters/1', {}, None, 2),
+    ('main.get_exam_conflicts', 'GET'): ('/exam-conflicts/1', {}, None, 3),
+    ('main.handle_students', 'GET'): ('/students', {}, None, 1),
+    ('main.handle_students', 'POST'): ('/students', {}, lambda ctx: {
+        'roll_number': 'BUDGET-NEW', 'name': 'Budget Student', 'course': 'CSE', 'semester': 1}, 2),
+    ('main.handle_users', 'GET'): ('/users', {}, None, 1),
+    ('main.handle_users', 'POST'): ('/users', {}, lambda ctx: {
+        'username': 'budget-viewer', 'password': 'x', 'role': 'viewer'}, 2),
+    ('main.me', 'GET'): ('/me', ADMIN, None, 1),
+    ('main.handle_classrooms', 'GET'): ('/classrooms', {}, None, 1),
+    ('main.handle_classrooms', 'POST'): ('/classrooms', {}, lambda ctx: {
+        'name': 'Budget Hall', 'capacity': 4, 'rows': 2, 'columns': 2}, 1),
+    ('main.get_seat_map', 'GET'): ('/classrooms/1/seat-map', {}, None, 1),
+    # Seat (1, 1) is occupied in every seeded exam, so this is refused...
+    ('main.edit_seat_map', 'PUT'): ('/classrooms/1/seat-map', ADMIN, lambda ctx: {
+        'blocked': [[1, 1], [5, 8]]}, 3),
+    # ...until forced, which bumps every affected exam's plan version at once
+    ('main.edit_seat_map', 'PUT force'): ('/classrooms/1/seat-map', ADMIN, lambda ctx: {
+        'blocked': [[1, 1], [5, 8]], 'force': True}, 7),
+    ('main.edit_seat_map', 'DELETE'): ('/classrooms/1/seat-map', ADMIN, None, 4),
+    ('main.handle_exams', 'GET'): ('/exams', {}, None, 1),
+    ('main.handle_exams', 'POST'): ('/exams', ADMIN, lambda ctx: {
+        'subject_code': 'BG101', 'subject_name': 'Budget', 'date': '2031-06-01T09:00',
+        'duration': 180, 'session': 'Morning', 'branches': 'CSE'}, 3),
+    ('main.generate_timetable', 'POST'): ('/exams/timetable', ADMIN, lambda ctx: {
+        'subjects': [{'subject_code': f'TT{i}', 'branches': COURSES[i % 3]} for i in range(6)],
+        'dates': ['2031-02-01', '2031-02-02'], 'sessions': ['Morning', 'Afternoon']}, 5),
+    ('main.update_seating', 'POST'): ('/update-seating/1', ADMIN, lambda ctx: ctx['plan'], 12),
+    ('main.generate_seating', 'POST'): ('/generate-seating/1', ADMIN, lambda ctx: {
+        'strategy': 'optimize', 'deadline_ms': 50}, 16),
+    ('main.seating_events', 'GET'): None,  # long-lived event stream
+}
+
+
+def seed(size):
+    """Students across three courses, enough rooms to hold them and a batch
+    of CSE/IT exams, two per day so conflict checks have overlaps to report.
+    Every exam is fully seated. Everything scales with `size`.
+    """
+    db.session.add(User(username=ADMIN['X-User'], role='admin', password_hash='-'))
+    students = []
+    for i in range(size):
+        course = COURSES[i % len(COURSES)]
+        students.append(Student(roll_number=f'20{i:06d}', name=f'{course} Student {i}',
+                                course=course, semester=1))
+    db.session.add_all(students)
+
+    rooms = max(size // 30, 1)
+    classrooms = [Classroom(name=f'Room {i}', capacity=40, rows=5, columns=8) for i in range(rooms)]
+    db.session.add_all(classrooms)
+
+    day = datetime(2031, 1, 1, 9)
+    exams = [Exam(subject_code=f'EX{i}', subject_name=f'Exam {i}', date=day + timedelta(days=i // 2),
+                  duration=180, session='Morning', branches='CSE,IT')
+             for i in range(max(size // 15, 2))]
+    db.session.add_all(exams)
+    db.session.flush()
+
+    # Seat the CSE/IT students for every exam, filling rooms row by row
+    eligible = [s for s in students if s.course in ('CSE', 'IT')]
+    for exam in exams:
+        for index, student in enumerate(eligible):
+            room, seat = divmod(index, 40)
+            db.session.add(SeatingArrangement(exam_id=exam.id, student_id=student.id,
+                                              classroom_id=classrooms[room % rooms].id,
+                                              row_number=seat // 8 + 1, column_number=seat % 8 + 1))
+    db.session.commit()
+
+
+def measure(size, verbose=False):
+    """Return {route key: (status code, statement count)} for one dataset size"""
+    workdir = tempfile.mkdtemp(prefix='seatplanner-budget-')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'budget.db')}"})
+    init_db(app)
+    results = {}
+
+    with app.app_context():
+        seed(size)
+        engine = db.engine
+    client = app.test_client()
+    context = {'plan': client.get('/seating-plan/1').get_json()}
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for key, spec in ROUTE_BUDGETS.items():
+            if spec is None:
+                continue
+            path, headers, body, _ = spec
+            method = key[1].split()[0]
+            statements.clear()
+            if method == 'GET':
+                response = client.get(path, headers=headers)
+            else:
+                response = client.open(path, method=method, headers=headers,
+                                       json=body(context) if body else None)
+            results[key] = (response.status_code, len(statements))
+            if verbose:
+                print(f'  [{size}] {key[1]:<12} {path:<40} {response.status_code} {len(statements)}')
+                for statement in statements:
+                    print('      ', ' '.join(statement.split())[:120])
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def registered_routes():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint.startswith('main.'):
+            for method in rule.methods - {'HEAD', 'OPTIONS'}:
+                routes.add((rule.endpoint, method))
+    return routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check per-route SQL statement budgets')
+    parser.add_argument('--small', type=int, default=30, help='Students in the small dataset')
+    parser.add_argument('--large', type=int, default=120, help='Students in the large dataset')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print every statement')
+    args = parser.parse_args()
+
+    failures = []
+    declared = {(endpoint, method.split()[0]) for endpoint, method in ROUTE_BUDGETS}
+    for route in sorted(registered_routes() - declared):
+        failures.append(f'{route[0]} {route[1]}: no query budget declared')
+
+    small = measure(args.small, args.verbose)
+    large = measure(args.large, args.verbose)
+
+    print(f"{'route':<46} {'status':>6} {args.small:>6} {args.large:>6} {'budget':>6}")
+    for key, spec in ROUTE_BUDGETS.items():
+        if spec is None:
+            print(f'{key[0] + " " + key[1]:<46} {"skip":>6}')
+            continue
+        budget = spec[3]
+        small_status, small_count = small[key]
+        large_status, large_count = large[key]
+        print(f'{key[0] + " " + key[1]:<46} {large_status:>6} {small_count:>6} {large_count:>6} {budget:>6}')
+        name = f'{key[0]} {key[1]}'
+        if small_status >= 500 or large_status >= 500:
+            failures.append(f'{name}: server error ({small_status}/{large_status})')
+        if large_count > small_count:
+            failures.append(f'{name}: statements grow with data ({small_count} -> {large_count})')
+        if max(small_count, large_count) > budget:
+            failures.append(f'{name}: {max(small_count, large_count)} statements exceeds budget of {budget}')
+
+    if failures:
+        print('\nFAILED')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+    print('\nAll routes within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import argparse
-from app import create_app
+from app import create_app, init_db
 from app.models import db, User
 
 parser = argparse.ArgumentParser(description='Create an admin user for the SeatPlanner app')
@@ -8,6 +8,7 @@ parser.add_argument('--password', '-p', default='secret123', help='Admin passwor
 args = parser.parse_args()
 
 app = create_app()
+init_db(app)
 
 with app.app_context():
     existing = User.query.filter_by(username=args.username).first()
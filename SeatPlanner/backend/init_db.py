@@ -0,0 +1,8 @@
+from app import create_app, init_db
+
+# One-time schema step: creates missing tables, columns and indexes without touching data.
+# Run this before starting the production server (serve.py) for the first time
+# and after upgrades that add tables, columns or indexes.
+app = create_app()
+init_db(app)
+print("Database schema is up to date.")
@@ -0,0 +1,299 @@
+"""Exam-day load generator for the SeatPlanner API.
+
+Drives a weighted mix of seating-plan lookups, available-student queries,
+exam listings, plan edits and regenerations from many concurrent clients,
+either in-process through the WSGI app or against a running server, and
+reports latency percentiles, throughput and error rates per endpoint.
+
+Examples:
+    python loadtest.py --clients 50 --duration 30
+    python loadtest.py --url http://localhost:5000 --label gunicorn-4w --output gunicorn.json
+    python loadtest.py --compare devserver.json gunicorn.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+DEFAULT_MIX = 'seating-plan=60,available-students=20,exams=12,update-seating=5,generate-seating=3'
+ENDPOINTS = ('seating-plan', 'available-students', 'exams', 'update-seating', 'generate-seating')
+
+
+class InProcessClient:
+    """Calls the Flask app directly through its test client (one per thread)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers, body=None):
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """Plain urllib client for a server listening on localhost"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, headers, body=None):
+        data = None
+        headers = dict(headers)
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f'Unknown endpoint in mix: {name} (choose from {", ".join(ENDPOINTS)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_client(index, client, args, mix, admin_headers, deadline, start_at, samples):
+    rng = random.Random(args.seed + index)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    exam_ids = args.exam_ids
+
+    # Stagger client start-up to model the ramp into the 9 a.m. spike
+    delay = start_at - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+    local = []
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        exam_id = rng.choice(exam_ids)
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            if name == 'seating-plan':
+                status, _ = client.request('GET', f'/seating-plan/{exam_id}', {})
+            elif name == 'available-students':
+                status, _ = client.request('GET', f'/available-students/{exam_id}', {})
+            elif name == 'exams':
+                status, _ = client.request('GET', '/exams', {})
+            elif name == 'update-seating':
+                # An editor saves the plan they just loaded
+                plan_status, plan = client.request('GET', f'/seating-plan/{exam_id}', {})
+                started = time.perf_counter()
+                if plan_status != 200:
+                    status = plan_status
+                else:
+                    status, _ = client.request('POST', f'/update-seating/{exam_id}', admin_headers,
+                                               json.loads(plan))
+            elif name == 'generate-seating':
+                body = dict(args.generate_body, seed=rng.randrange(args.generate_seeds))
+                status, _ = client.request('POST', f'/generate-seating/{exam_id}', admin_headers, body)
+        except Exception as e:  # connection resets, timeouts, etc.
+            error = type(e).__name__
+        local.append((name, (time.perf_counter() - started) * 1000.0, status, error))
+        if args.think_ms:
+            time.sleep(rng.uniform(0, 2 * args.think_ms) / 1000.0)
+
+    samples.extend(local)
+
+
+def summarise(samples, elapsed):
+    by_endpoint = {}
+    for name, latency, status, error in samples:
+        by_endpoint.setdefault(name, []).append((latency, status, error))
+    by_endpoint['total'] = [(latency, status, error) for _, latency, status, error in samples]
+
+    report = {}
+    for name, rows in by_endpoint.items():
+        latencies = sorted(r[0] for r in rows)
+        errors = sum(1 for _, status, error in rows if error or (status or 0) >= 500)
+        client_errors = sum(1 for _, status, error in rows if not error and 400 <= (status or 0) < 500)
+        report[name] = {
+            'requests': len(rows),
+            'errors': errors,
+            'client_errors': client_errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'throughput_rps': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': _round(percentile(latencies, 50)),
+            'p95_ms': _round(percentile(latencies, 95)),
+            'p99_ms': _round(percentile(latencies, 99)),
+            'max_ms': _round(latencies[-1] if latencies else None)
+        }
+    return report
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def print_report(result):
+    print(f"\n{result['label']}: {result['config']['clients']} clients, "
+          f"{result['elapsed_s']:.1f}s, target {result['config']['target']}")
+    print(f"{'endpoint':<20} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'4xx':>5}")
+    for name, stats in result['endpoints'].items():
+        print(f"{name:<20} {stats['requests']:>7} {stats['throughput_rps']:>8.1f} "
+              f"{_fmt(stats['p50_ms'])} {_fmt(stats['p95_ms'])} {_fmt(stats['p99_ms'])} "
+              f"{stats['error_rate'] * 100:>6.2f} {stats['client_errors']:>5}")
+
+
+def _fmt(value):
+    return f'{value:>8.1f}' if value is not None else f"{'-':>8}"
+
+
+def compare(paths):
+    results = []
+    for path in paths:
+        with open(path) as f:
+            results.append(json.load(f))
+    base = results[0]
+    for other in results[1:]:
+        print(f"\n{base['label']} -> {other['label']}")
+        print(f"{'endpoint':<20} {'rps':>18} {'p95 ms':>20} {'p99 ms':>20} {'err%':>14}")
+        for name in base['endpoints']:
+            a, b = base['endpoints'][name], other['endpoints'].get(name)
+            if b is None:
+                continue
+            print(f"{name:<20} {_delta(a['throughput_rps'], b['throughput_rps']):>18} "
+                  f"{_delta(a['p95_ms'], b['p95_ms']):>20} {_delta(a['p99_ms'], b['p99_ms']):>20} "
+                  f"{a['error_rate'] * 100:>6.2f}->{b['error_rate'] * 100:<6.2f}")
+
+
+def _delta(a, b):
+    if a is None or b is None:
+        return '-'
+    change = f'{(b - a) / a * 100:+.0f}%' if a else ''
+    return f'{a:.1f}->{b:.1f} {change}'
+
+
+def make_in_process_app(db_path):
+    """Build the app against a throwaway copy of the database so writes in
+    the mix never touch the real one.
+    """
+    from app import create_app, init_db
+
+    workdir = tempfile.mkdtemp(prefix='seatplanner-load-')
+    target = os.path.join(workdir, 'load.db')
+    if db_path is None:
+        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'app', 'instance', 'seating_arrangement.db')
+    if os.path.exists(db_path):
+        shutil.copyfile(db_path, target)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{target}'})
+    init_db(app)
+    return app, workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay exam-day traffic against the SeatPlanner API')
+    parser.add_argument('--url', help='Base URL of a running server; omit to drive the app in-process')
+    parser.add_argument('--db', help='In-process mode: database to copy and load-test against')
+    parser.add_argument('--clients', type=int, default=20, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run after ramp-up starts')
+    parser.add_argument('--ramp', type=float, default=0.0, help='Seconds over which clients start')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='Mean pause between a client\'s requests')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted endpoint mix (default: {DEFAULT_MIX})')
+    parser.add_argument('--exams', default='1', help='Comma-separated exam ids to target')
+    parser.add_argument('--user', default='admin', help='Admin username for write endpoints')
+    parser.add_argument('--token', help='Admin password, if the server checks it')
+    parser.add_argument('--generate-body', default='{}', help='JSON body for /generate-seating requests')
+    parser.add_argument('--generate-seeds', type=int, default=4,
+                        help='Number of distinct seeds regenerations cycle through')
+    parser.add_argument('--timeout', type=float, default=30.0, help='HTTP timeout per request (seconds)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the traffic generator')
+    parser.add_argument('--label', help='Name for this run in reports (default: target)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', nargs='+', metavar='RESULT', help='Compare saved result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return 0
+
+    mix = parse_mix(args.mix)
+    args.exam_ids = [int(e) for e in args.exams.split(',')]
+    args.generate_body = json.loads(args.generate_body)
+    admin_headers = {'X-User': args.user}
+    if args.token:
+        admin_headers['X-Token'] = args.token
+
+    workdir = None
+    if args.url:
+        target = args.url
+        clients = [HttpClient(args.url, args.timeout) for _ in range(args.clients)]
+    else:
+        app, workdir = make_in_process_app(args.db)
+        target = 'in-process'
+        clients = [InProcessClient(app) for _ in range(args.clients)]
+
+    samples = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_client, daemon=True,
+                         args=(i, clients[i], args, mix, admin_headers, deadline,
+                               start + args.ramp * i / max(args.clients, 1), samples))
+        for i in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        'label': args.label or target,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_s': round(elapsed, 3),
+        'config': {
+            'target': target,
+            'clients': args.clients,
+            'duration_s': args.duration,
+            'ramp_s': args.ramp,
+            'think_ms': args.think_ms,
+            'mix': mix,
+            'exams': args.exam_ids,
+            'generate_body': args.generate_body
+        },
+        'endpoints': summarise(samples, elapsed)
+    }
+    print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'\nResults written to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
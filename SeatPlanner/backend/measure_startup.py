@@ -0,0 +1,160 @@
+"""Measure cold start and per-worker memory of the production server.
+
+1. Times `create_app()` in fresh interpreters, with and without the schema
+   step that used to run on every boot. Both run against a copy of the
+   database.
+2. Starts serve.py with the requested number of workers, times how long it
+   takes until /readyz answers, and reads each process's RSS and PSS
+   (proportional set size, which credits pages shared copy-on-write after
+   preloading) from /proc.
+
+Usage: python measure_startup.py [--workers 4] [--runs 5] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CREATE_APP_SNIPPET = """
+import time
+t = time.perf_counter()
+from app import create_app, init_db
+app = create_app()
+{extra}
+print(time.perf_counter() - t)
+"""
+
+
+def time_create_app(runs, with_schema, env):
+    extra = 'init_db(app)' if with_schema else ''
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', CREATE_APP_SNIPPET.format(extra=extra)],
+                             cwd=HERE, env=env, capture_output=True, text=True, check=True).stdout
+        samples.append(float(out.strip().splitlines()[-1]) * 1000)
+    return statistics.median(samples)
+
+
+def read_memory_kb(pid):
+    memory = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                memory['rss_kb'] = int(line.split()[1])
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    memory['pss_kb'] = int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return memory
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # Field 4 is the parent pid; the command name may contain spaces
+                fields = f.read().rsplit(')', 1)[1].split()
+            if int(fields[1]) == pid:
+                children.append(int(entry))
+        except (FileNotFoundError, ProcessLookupError, IndexError):
+            continue
+    return sorted(children)
+
+
+def measure_server(workers, port, timeout, env):
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}',
+                             '--workers', str(workers)],
+                            cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    ready_ms = None
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=1) as response:
+                    if response.status == 200:
+                        ready_ms = (time.perf_counter() - started) * 1000
+                        break
+            except OSError:
+                time.sleep(0.05)
+
+        # Give the remaining workers a moment to finish booting
+        deadline = time.perf_counter() + 5
+        while len(child_pids(proc.pid)) < workers and time.perf_counter() < deadline:
+            time.sleep(0.1)
+
+        master = read_memory_kb(proc.pid)
+        worker_memory = [dict(read_memory_kb(pid), pid=pid) for pid in child_pids(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=35)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    return {'ready_ms': ready_ms, 'master': master, 'workers': worker_memory}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure SeatPlanner cold start and worker memory')
+    parser.add_argument('--workers', type=int, default=4, help='Workers to start')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per create_app timing')
+    parser.add_argument('--port', type=int, default=8765, help='Port for the temporary server')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for readiness')
+    parser.add_argument('--output', help='Write the measurements as JSON to this file')
+    args = parser.parse_args()
+
+    # Work on a copy of the database so the schema step never touches the real one
+    workdir = tempfile.mkdtemp(prefix='seatplanner-startup-')
+    db_copy = os.path.join(workdir, 'startup.db')
+    source = os.path.join(HERE, 'app', 'instance', 'seating_arrangement.db')
+    if os.path.exists(source):
+        shutil.copyfile(source, db_copy)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_copy}')
+    try:
+        subprocess.run([sys.executable, 'init_db.py'], cwd=HERE, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+        result = {
+            'create_app_ms': round(time_create_app(args.runs, False, env), 1),
+            'create_app_with_schema_ms': round(time_create_app(args.runs, True, env), 1),
+            'server': measure_server(args.workers, args.port, args.timeout, env)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    server = result['server']
+    print(f"create_app():            {result['create_app_ms']:.1f} ms (median of {args.runs})")
+    print(f"create_app() + init_db:  {result['create_app_with_schema_ms']:.1f} ms")
+    if server['ready_ms'] is None:
+        print(f'server did not become ready within {args.timeout}s')
+    else:
+        print(f"serve.py ready after:    {server['ready_ms']:.0f} ms with {args.workers} workers")
+    print(f"master:  rss {server['master'].get('rss_kb', 0) / 1024:.1f} MiB  "
+          f"pss {server['master'].get('pss_kb', 0) / 1024:.1f} MiB")
+    for worker in server['workers']:
+        print(f"worker {worker['pid']}: rss {worker.get('rss_kb', 0) / 1024:.1f} MiB  "
+              f"pss {worker.get('pss_kb', 0) / 1024:.1f} MiB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'\nResults written to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
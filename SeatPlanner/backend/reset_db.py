@@ -1,5 +1,5 @@
 from app import create_app
-from app.models import db, Student, Classroom, Exam
+from app.models import db, ensure_indexes, Student, Classroom, Exam
 from datetime import datetime, timedelta
 
 def reset_database():
@@ -13,6 +13,7 @@ def reset_database():
         # Create fresh tables
         print("Creating new tables...")
         db.create_all()
+        ensure_indexes()
         
         # Add sample data
         print("Adding sample data...")
@@ -1,6 +1,9 @@
-from app import create_app
+from app import create_app, init_db
 
 app = create_app()
 
 if __name__ == '__main__':
+    # The development server creates the schema on start for convenience;
+    # production runs init_db.py once instead (see serve.py)
+    init_db(app)
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Production server: gunicorn with the app preloaded before workers fork.
+
+The app is imported and built once in the master process, so each worker
+starts serving immediately and shares the loaded code copy-on-write. Workers
+are recycled after a jittered number of requests and are given time to
+finish in-flight requests on shutdown or reload (SIGHUP).
+
+Run init_db.py once beforehand; this entry point never touches the schema
+and refuses to start if tables or columns are missing.
+
+Usage: python serve.py [--bind 0.0.0.0:8000] [--workers 4] [--threads 16]
+
+Seating change streams (/seating-events) under several workers: detailed
+events reach editors served by the worker that made the change, and every
+other stream picks the change up from the stored plan version as a `resync`
+within a couple of seconds. Each open stream occupies one worker thread
+until the client disconnects, so size --threads for the expected number of
+live editors per worker. Recycling a worker closes its streams; browsers
+reconnect on their own and are sent `resync` if they missed a change.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from gunicorn.app.base import BaseApplication
+from app import create_app
+from app.models import db, missing_schema
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared across processes
+    with server.app.application.app_context():
+        db.engine.dispose()
+
+
+class SeatPlannerServer(BaseApplication):
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def main():
+    default_workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    parser = argparse.ArgumentParser(description='Run SeatPlanner under gunicorn')
+    parser.add_argument('--bind', default=os.environ.get('BIND', '0.0.0.0:8000'), help='Address to listen on')
+    parser.add_argument('--workers', type=int, default=default_workers, help='Worker processes')
+    parser.add_argument('--threads', type=int, default=16,
+                        help='Threads per worker; each open event stream holds one')
+    parser.add_argument('--max-requests', type=int, default=2000,
+                        help='Recycle a worker after this many requests (0 disables)')
+    parser.add_argument('--timeout', type=int, default=60, help='Kill workers silent for this long')
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help='Seconds workers get to finish requests on restart')
+    args = parser.parse_args()
+
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'preload_app': True,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'keepalive': 5,
+        'post_fork': post_fork,
+        'accesslog': '-',
+    }
+    app = create_app()
+    # Check in the master, before forking, instead of serving 500s later
+    with app.app_context():
+        missing = missing_schema()
+        db.engine.dispose()
+    if missing:
+        sys.exit(f"Database schema is out of date (missing {', '.join(missing)}); run init_db.py first")
+    SeatPlannerServer(app, options).run()
+
+
+if __name__ == '__main__':
+    main()